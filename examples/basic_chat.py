@@ -36,7 +36,8 @@ async def main():
         
         # Display title
         st.title("StreamlitChat Basic Example")
-        
+        st.markdown("Chat interface ready!")
+
         # Render the chat interface
         await ui.render()
         
@@ -15,6 +15,27 @@ from streamlitchat.logging_config import configure_logging, LogConfig, LogContex
 
 logger = logging.getLogger(__name__)
 
+
+@st.cache_resource
+def _get_chat_ui(test_mode: bool) -> ChatUI:
+    """Build the ChatUI once per server process.
+
+    Reconstructing the UI on every rerun repeats settings loading, the
+    history-directory scan and the most-recent-conversation load, and
+    throws away its per-instance caches (highlighted code blocks, the
+    saved-chats listing, recycled components). Caching the instance keeps
+    that work out of the rerun path.
+
+    Args:
+        test_mode: Forwarded to ChatInterface and ChatUI.
+
+    Returns:
+        ChatUI: The shared UI instance for this process.
+    """
+    chat_interface = ChatInterface(test_mode=test_mode)
+    return ChatUI(chat_interface, test_mode=test_mode)
+
+
 async def main(test_mode: bool = False) -> Optional[ChatUI]:
     """Main application entry point.
     
@@ -42,12 +63,15 @@ async def main(test_mode: bool = False) -> Optional[ChatUI]:
         # Set title
         st.title("StreamlitChat")
         
-        # Initialize chat interface with API key from environment
-        chat_interface = ChatInterface(test_mode=test_mode)
-        
-        # Create and render UI
-        ui = ChatUI(chat_interface, test_mode=test_mode)
-        
+        # Reuse the cached UI (and its chat interface) across reruns
+        ui = _get_chat_ui(test_mode)
+
+        # The cached instance only ran __init__ in the first session of
+        # this process; every other browser session arrives with an empty
+        # st.session_state. Re-run the (cheap, guarded) initialization so
+        # each session gets its own messages, settings and page state.
+        ui._initialize_session_state()
+
         # Generate request ID for this session
         with LogContext():
             logger.info("Starting new chat session")
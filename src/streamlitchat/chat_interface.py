@@ -118,6 +118,27 @@ class ChatInterface:
         
         return True
     
+    def apply_params(
+        self,
+        temperature: float,
+        top_p: float,
+        presence_penalty: float,
+        frequency_penalty: float
+    ) -> None:
+        """Apply all API sampling parameters in a single update.
+
+        Args:
+            temperature: Controls randomness in responses.
+            top_p: Controls diversity via nucleus sampling.
+            presence_penalty: Penalty for new tokens.
+            frequency_penalty: Penalty for frequent tokens.
+        """
+        self.temperature = temperature
+        self.top_p = top_p
+        self.presence_penalty = presence_penalty
+        self.frequency_penalty = frequency_penalty
+        logger.debug("Applied API parameters in bulk update")
+
     async def send_message(self, message: str) -> str:
         """Send a message and get a response.
         
@@ -1,7 +1,7 @@
 """Logging configuration for StreamlitChat."""
 import logging
 import logging.handlers
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
 import os
@@ -13,7 +13,10 @@ class LogConfig:
     """Configuration for logging setup.
     
     Args:
-        log_dir: Directory for log files
+        log_dir: Directory for log files; defaults to the
+            STREAMLITCHAT_LOG_DIR environment variable, falling back to
+            "logs" (the test suite points it at a temp directory so runs
+            don't write into the repo)
         log_level: Logging level
         max_bytes: Maximum bytes per log file
         backup_count: Number of backup files to keep
@@ -23,7 +26,9 @@ class LogConfig:
         >>> config = LogConfig(log_dir="logs", log_level=logging.DEBUG)
         >>> configure_logging(config)
     """
-    log_dir: Path = Path("logs")
+    log_dir: Path = field(
+        default_factory=lambda: Path(os.environ.get("STREAMLITCHAT_LOG_DIR", "logs"))
+    )
     log_level: int = logging.INFO
     max_bytes: int = 10 * 1024 * 1024  # 10MB
     backup_count: int = 5
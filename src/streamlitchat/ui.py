@@ -5,21 +5,222 @@ It handles the layout, message display, input fields, and other UI elements.
 """
 
 import streamlit as st
-from typing import Optional, List, Dict, Any, Set
+import types
+from typing import Optional, List, Dict, Any, Set, Tuple, Iterator, Mapping
 from streamlitchat.chat_interface import ChatInterface
+import base64
+import functools
+import hashlib
+import itertools
 import logging
+import os
 import time
 import re
+from collections import deque
 from pathlib import Path
 import json
 from datetime import datetime
-from pygments import highlight
-from pygments.lexers import get_lexer_by_name, guess_lexer
-from pygments.formatters import HtmlFormatter
+
+# Optional C-backed JSON codec; the handle is a module or None so the
+# fallback branches below stay reachable for the type checker
+orjson: Optional[types.ModuleType]
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Add logger
 logger = logging.getLogger(__name__)
 
+
+def _json_dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serialize an object to JSON bytes, preferring the C-backed orjson.
+
+    Args:
+        obj: Object to serialize.
+        indent: Whether to pretty-print with two-space indentation.
+
+    Returns:
+        bytes: UTF-8 encoded JSON.
+    """
+    if orjson is not None:
+        payload: bytes = orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+        return payload
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode()
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def _json_loads(data: bytes) -> Any:
+    """Deserialize JSON bytes, preferring the C-backed orjson."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# Fenced code blocks with or without a language specification
+_CODE_BLOCK_RE = re.compile(r'```(\w+)?\n(.*?)\n```', re.DOTALL)
+
+
+@functools.cache
+def _pygments() -> Tuple[Any, Any, Any, Any]:
+    """Import pygments on first use.
+
+    Importing pygments at module load adds noticeable startup latency to
+    every script run; messages without code blocks never pay for it.
+    """
+    from pygments import highlight
+    from pygments.lexers import get_lexer_by_name, guess_lexer
+    from pygments.formatters import HtmlFormatter
+    return highlight, get_lexer_by_name, guess_lexer, HtmlFormatter
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_lexer_by_name(lang: str) -> Any:
+    """Resolve a Pygments lexer by name, caching the registry lookup."""
+    _, get_lexer_by_name, _, _ = _pygments()
+    return get_lexer_by_name(lang)
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_guess_lexer(code: str) -> Any:
+    """Guess a lexer for a code snippet, caching by snippet content."""
+    _, _, guess_lexer, _ = _pygments()
+    return guess_lexer(code)
+
+
+@functools.cache
+def _html_formatter() -> Any:
+    """Single formatter shared across all code blocks; constructing one
+    per block rebuilds the style map every time."""
+    _, _, _, HtmlFormatter = _pygments()
+    return HtmlFormatter()
+
+
+def _highlight_block(lang: Optional[str], code: str, raw: str) -> str:
+    """Highlight a single fenced code block.
+
+    Args:
+        lang: Language tag from the fence, if any.
+        code: Code inside the fence.
+        raw: The original fenced block, returned verbatim on failure.
+
+    Returns:
+        str: Highlighted HTML, or the raw block if highlighting fails.
+    """
+    try:
+        lexer = _cached_lexer_by_name(lang) if lang else _cached_guess_lexer(code)
+        highlighted = _pygments()[0](code, lexer, _html_formatter())
+        return f'<div class="highlight">{highlighted}</div>'
+    except Exception:
+        return raw
+
+
+@st.cache_data(max_entries=30)
+def _render_message_html(role: str, content: str) -> str:
+    """Return the display HTML for a message, memoized across reruns.
+
+    Recycling Python component objects never saved any rendering work,
+    because Streamlit re-executes the script top-down regardless; caching
+    the processed HTML does. The role participates in the cache key so
+    identical text from different speakers is kept distinct.
+
+    Args:
+        role: Message role ('user' or 'assistant').
+        content: Raw message content.
+
+    Returns:
+        str: Content with code blocks syntax-highlighted.
+    """
+    if '```' not in content:
+        return content
+
+    def replace_code_block(match: "re.Match[str]") -> str:
+        return _highlight_block(match.group(1) or None, match.group(2), match.group(0))
+
+    return _CODE_BLOCK_RE.sub(replace_code_block, content)
+
+# Theme style definitions, shared read-only across all ChatUI instances
+_LIGHT_THEME: Mapping[str, str] = types.MappingProxyType({
+    'background_color': '#ffffff',
+    'text_color': '#000000',
+    'sidebar_bg': '#f8f9fa',
+    'input_bg': '#f0f2f6',
+    'border_color': '#e6e6e6'
+})
+_DARK_THEME: Mapping[str, str] = types.MappingProxyType({
+    'background_color': '#1E1E1E',
+    'text_color': '#ffffff',
+    'sidebar_bg': '#262626',
+    'input_bg': '#2d2d2d',
+    'border_color': '#404040'
+})
+_THEMES: Dict[str, Mapping[str, str]] = {'light': _LIGHT_THEME, 'dark': _DARK_THEME}
+
+
+@functools.lru_cache(maxsize=8)
+def _paginate(length: int, page: int, per_page: int) -> Tuple[int, int]:
+    """Compute the message-index window for a page of conversation pairs.
+
+    The same (length, page) pair recurs on every rerun between messages,
+    so the arithmetic is memoized.
+
+    Args:
+        length: Total number of stored messages.
+        page: Zero-based page number, 0 being the newest page.
+        per_page: Messages per page (two per conversation).
+
+    Returns:
+        Tuple[int, int]: (start_idx, end_idx) in message space.
+    """
+    conversations_per_page = per_page // 2
+    start_conv = max(0, (length // 2) - (page + 1) * conversations_per_page)
+    end_conv = max(0, (length // 2) - page * conversations_per_page)
+    return start_conv * 2, end_conv * 2
+
+
+def _build_theme_css(styles: Mapping[str, str]) -> str:
+    """Build the CSS block applying the given theme styles."""
+    return f"""
+        <style>
+            .stApp {{
+                background-color: {styles['background_color']};
+                color: {styles['text_color']};
+            }}
+            .stSidebar {{
+                background-color: {styles['sidebar_bg']};
+            }}
+            .stTextInput {{
+                background-color: {styles['input_bg']};
+                border-color: {styles['border_color']};
+            }}
+        </style>
+        """
+
+
+# Full CSS per theme, interpolated once at import instead of per rerun
+_THEME_CSS: Dict[str, str] = {
+    name: _build_theme_css(styles) for name, styles in _THEMES.items()
+}
+
+# Keyboard shortcut script, hoisted so it is built once per interpreter
+_KB_SCRIPT = """
+    <script>
+        if (!window._streamlitKbInstalled) {
+            document.addEventListener('keydown', function(e) {
+                if (e.key === 'Enter' && !e.shiftKey) {
+                    e.preventDefault();
+                    window.streamlitKeyboardTrigger('enter');
+                }
+                if (e.key === 'l' && e.ctrlKey) {
+                    e.preventDefault();
+                    window.streamlitKeyboardTrigger('ctrl+l');
+                }
+            });
+            window._streamlitKbInstalled = true;
+        }
+    </script>
+"""
+
 class ChatUI:
     """Main UI class for the Streamlit chat interface."""
 
@@ -27,18 +228,21 @@ class ChatUI:
     VALID_THEMES = {'light', 'dark'}  # Valid theme options
     MESSAGES_PER_PAGE = 10  # Number of messages to display per page
     MESSAGES_PER_VIEW = 20  # Number of messages to render in viewport
-    MAX_RECYCLED_COMPONENTS = 30  # Maximum number of recycled message components
+    STREAM_FLUSH_INTERVAL = 0.05  # Minimum seconds between streaming redraws
 
     def __init__(self, chat_interface: Optional[ChatInterface] = None, test_mode: bool = False) -> None:
         """Initialize the ChatUI."""
         self.chat_interface = chat_interface or ChatInterface()
         self.test_mode = test_mode
-        self.current_page = 0
-        self.scroll_position = 0
-        self.recycled_components: Dict[str, Any] = {}
+        # Highlighted code blocks keyed by content hash; message content is
+        # immutable once appended, so entries never go stale
+        self._highlight_cache: Dict[str, str] = {}
+        # Saved-conversation listing keyed by history directory mtime
+        self._chats_cache: Optional[Tuple[float, List[Path]]] = None
         
-        # Initialize history directory
-        self.history_dir = Path("chat_history")
+        # Initialize history directory; overridable so the test suite can
+        # point conversation saves at a temp directory
+        self.history_dir = Path(os.environ.get("STREAMLITCHAT_HISTORY_DIR", "chat_history"))
         self.history_dir.mkdir(exist_ok=True)
         
         self._initialize_session_state()
@@ -54,16 +258,61 @@ class ChatUI:
                 except Exception as e:
                     logger.warning(f"Failed to load most recent conversation: {e}")
 
+    # Per-session UI state lives in st.session_state, not on the
+    # instance: the ChatUI object is cached per server process
+    # (st.cache_resource in app.py) and shared by every browser session,
+    # so instance attributes would leak one session's view into another.
+
+    @property
+    def current_page(self) -> int:
+        """Zero-based page of the conversation view for this session."""
+        return st.session_state.get('current_page', 0)
+
+    @current_page.setter
+    def current_page(self, value: int) -> None:
+        st.session_state.current_page = value
+
+    @property
+    def scroll_position(self) -> int:
+        """Viewport scroll offset for this session."""
+        return st.session_state.get('scroll_position', 0)
+
+    @scroll_position.setter
+    def scroll_position(self, value: int) -> None:
+        st.session_state.scroll_position = value
+
+    @property
+    def _last_params(self) -> Optional[Tuple[float, float, float, float]]:
+        """Slider values last pushed to the chat interface this session."""
+        return st.session_state.get('_last_params')
+
+    @_last_params.setter
+    def _last_params(self, value: Optional[Tuple[float, float, float, float]]) -> None:
+        st.session_state._last_params = value
+
+    @property
+    def _last_saved_settings(self) -> Optional[bytes]:
+        """Serialized settings last written to this session's query params."""
+        return st.session_state.get('_last_saved_settings')
+
+    @_last_saved_settings.setter
+    def _last_saved_settings(self, value: Optional[bytes]) -> None:
+        st.session_state._last_saved_settings = value
+
     def _initialize_session_state(self) -> None:
         """Initialize Streamlit session state variables."""
         if "messages" not in st.session_state:
-            st.session_state.messages = []
+            # Bounded deque: appends beyond the limit evict the oldest
+            # message in O(1) instead of requiring a slice-and-reassign
+            st.session_state.messages = deque(maxlen=self.MAX_STORED_MESSAGES)
         if "is_processing" not in st.session_state:
             st.session_state.is_processing = False
         if "keyboard_trigger" not in st.session_state:
             st.session_state.keyboard_trigger = None
         if "current_page" not in st.session_state:
             st.session_state.current_page = 0
+        if "scroll_position" not in st.session_state:
+            st.session_state.scroll_position = 0
         if "settings" not in st.session_state:
             st.session_state.settings = {
                 'model': self.chat_interface.model_name,
@@ -97,45 +346,47 @@ class ChatUI:
         Returns:
             Processed content with syntax highlighted code blocks
         """
+        # Fast path: most chat messages contain no fenced code at all
+        if '```' not in content:
+            return content
+
         def replace_code_block(match):
             code = match.group(2)
             lang = match.group(1) or None
-            
-            try:
-                if lang:
-                    lexer = get_lexer_by_name(lang)
-                else:
-                    lexer = guess_lexer(code)
-                
-                highlighted = highlight(code, lexer, HtmlFormatter())
-                return f'<div class="highlight">{highlighted}</div>'
-            except Exception:
-                # Fallback to plain code block if highlighting fails
-                return match.group(0)
-        
-        # Find code blocks with or without language specification
-        pattern = r'```(\w+)?\n(.*?)\n```'
-        return re.sub(pattern, replace_code_block, content, flags=re.DOTALL)
+
+            key = hashlib.sha1(f"{lang}\0{code}".encode()).hexdigest()
+            cached = self._highlight_cache.get(key)
+            if cached is not None:
+                return cached
+
+            result = _highlight_block(lang, code, match.group(0))
+            self._highlight_cache[key] = result
+            return result
+
+        return _CODE_BLOCK_RE.sub(replace_code_block, content)
+
+    def _display_message_body(self, message: Dict[str, Any]) -> None:
+        """Render the body of a message inside an open chat-message context.
+
+        Args:
+            message: Message dictionary containing 'role' and 'content'.
+        """
+        # Process code blocks before displaying
+        processed_content = self._process_code_blocks(message["content"])
+        st.markdown(processed_content, unsafe_allow_html=True)
 
     def _display_message(self, message: Dict[str, Any]) -> None:
         """Display a single message in the chat interface.
-        
+
         Args:
             message: Message dictionary containing 'role' and 'content'.
         """
-        role = message["role"]
-        content = message["content"]
-        
-        # Process code blocks before displaying
-        processed_content = self._process_code_blocks(content)
-        
-        with st.chat_message(role):
-            st.markdown(processed_content, unsafe_allow_html=True)
+        with st.chat_message(message["role"]):
+            self._display_message_body(message)
 
     def _display_messages(self) -> None:
         """Display paginated messages in the chat interface."""
-        messages = self._get_paginated_messages()
-        for message in messages:
+        for message in self._iter_paginated_messages():
             self._display_message(message)
         
         # Add pagination controls if needed
@@ -165,13 +416,25 @@ class ChatUI:
                 st.session_state.messages.append(user_message)
                 self._display_message(user_message)
 
-                # Get AI response
-                full_response = ""
+                # Get AI response, coalescing chunks so the placeholder is
+                # redrawn at most ~20x/sec instead of once per token
+                chunks: List[str] = []
+                last_flush = time.monotonic()
                 async for chunk in self.chat_interface.send_message_stream(prompt):
-                    full_response += chunk
-                    with response_placeholder.container():  # Use placeholder
-                        st.chat_message("assistant").write(full_response)
-                
+                    # Append to a list and join on flush; repeated str
+                    # concatenation is quadratic over the whole stream
+                    chunks.append(chunk)
+                    now = time.monotonic()
+                    if now - last_flush > self.STREAM_FLUSH_INTERVAL:
+                        with response_placeholder.container():  # Use placeholder
+                            st.chat_message("assistant").write("".join(chunks))
+                        last_flush = now
+
+                # Final flush so the last partial batch is displayed
+                full_response = "".join(chunks)
+                with response_placeholder.container():
+                    st.chat_message("assistant").write(full_response)
+
                 # Add assistant message to history
                 assistant_message = {"role": "assistant", "content": full_response}
                 st.session_state.messages.append(assistant_message)
@@ -190,75 +453,93 @@ class ChatUI:
 
     def _render_sidebar(self) -> Dict[str, Any]:
         """Render the sidebar with settings and controls."""
-        # Generate a unique timestamp for this render
-        timestamp = int(time.time() * 1000)
-        
         with st.sidebar:
             st.subheader("Settings")
-            
+
+            # Snapshot settings once; every subscript chain through
+            # st.session_state re-enters the SessionStateProxy
+            settings = st.session_state.settings
+            api_params = dict(settings['api_params'])
+            current_theme = settings.get('theme', 'light')
+
             # Temperature slider
             temperature = st.slider(
                 "Temperature",
                 min_value=0.0,
                 max_value=2.0,
-                value=st.session_state.settings['api_params']['temperature'],
+                value=api_params['temperature'],
                 help="Controls randomness in responses",
-                key=f"temperature_slider_{timestamp}"
+                key="temperature_slider"
             )
-            st.session_state.settings['api_params']['temperature'] = temperature
-            self.chat_interface.temperature = temperature
-            
+
             # Top P slider
             top_p = st.slider(
                 "Top P",
                 min_value=0.0,
                 max_value=1.0,
-                value=st.session_state.settings['api_params']['top_p'],
+                value=api_params['top_p'],
                 help="Controls diversity via nucleus sampling",
-                key=f"top_p_slider_{timestamp}"
+                key="top_p_slider"
             )
-            st.session_state.settings['api_params']['top_p'] = top_p
-            self.chat_interface.top_p = top_p
-            
+
             # Presence Penalty slider
             presence_penalty = st.slider(
                 "Presence Penalty",
                 min_value=0.0,
                 max_value=2.0,
-                value=st.session_state.settings['api_params']['presence_penalty'],
+                value=api_params['presence_penalty'],
                 help="Controls repetition penalty",
-                key=f"presence_penalty_slider_{timestamp}"
+                key="presence_penalty_slider"
             )
-            st.session_state.settings['api_params']['presence_penalty'] = presence_penalty
-            self.chat_interface.presence_penalty = presence_penalty
-            
+
             # Frequency Penalty slider
             frequency_penalty = st.slider(
                 "Frequency Penalty",
                 min_value=0.0,
                 max_value=2.0,
-                value=st.session_state.settings['api_params']['frequency_penalty'],
+                value=api_params['frequency_penalty'],
                 help="Controls token frequency penalty",
-                key=f"frequency_penalty_slider_{timestamp}"
+                key="frequency_penalty_slider"
             )
-            st.session_state.settings['api_params']['frequency_penalty'] = frequency_penalty
-            self.chat_interface.frequency_penalty = frequency_penalty
-            
+
+            # Push all four parameters to the chat interface in one bulk
+            # update, skipping it entirely when the sliders didn't move
+            params = (temperature, top_p, presence_penalty, frequency_penalty)
+            if params != self._last_params:
+                self.chat_interface.apply_params(
+                    temperature=temperature,
+                    top_p=top_p,
+                    presence_penalty=presence_penalty,
+                    frequency_penalty=frequency_penalty
+                )
+                self._last_params = params
+
             # Theme selector
             theme = st.selectbox(
                 "Select Theme",
                 options=['light', 'dark'],
-                index=0 if st.session_state.settings['theme'] == 'light' else 1,
-                key=f"theme_selector_{timestamp}"
+                index=0 if current_theme == 'light' else 1,
+                key="theme_selector"
             )
-            st.session_state.settings['theme'] = theme
-            
+
+            # Batch-commit: one proxy write instead of five scattered ones
+            st.session_state.settings = {
+                'model': settings.get('model', self.chat_interface.model_name),
+                'api_params': {
+                    'temperature': temperature,
+                    'top_p': top_p,
+                    'presence_penalty': presence_penalty,
+                    'frequency_penalty': frequency_penalty
+                },
+                'theme': theme
+            }
+
             # Add conversation history section
             st.divider()
             st.subheader("Chat History")
             
             # Save current conversation
-            if st.button("💾 Save Current Conversation", key=f"save_chat_{timestamp}"):
+            if st.button("💾 Save Current Conversation", key="save_chat"):
                 self._save_conversation_to_file()
             
             # Load previous conversations
@@ -266,12 +547,13 @@ class ChatUI:
             if saved_chats:
                 st.write("Load previous conversation:")
                 for chat_file in saved_chats:
-                    # Extract timestamp from filename
-                    file_timestamp = chat_file.stem.replace("chat_", "")
-                    formatted_time = datetime.strptime(file_timestamp, "%Y%m%d_%H%M%S").strftime("%Y-%m-%d %H:%M:%S")
-                    
+                    # Filenames are chat_YYYYmmdd_HHMMSS.json; reformat with
+                    # slices instead of a strptime/strftime round trip
+                    s = chat_file.stem.replace("chat_", "")
+                    formatted_time = f"{s[0:4]}-{s[4:6]}-{s[6:8]} {s[9:11]}:{s[11:13]}:{s[13:15]}"
+
                     # Create a button for each saved conversation
-                    if st.button(f"📁 {formatted_time}", key=f"load_{chat_file.name}_{timestamp}"):
+                    if st.button(f"📁 {formatted_time}", key=f"load_{chat_file.name}"):
                         self._load_conversation_from_file(chat_file.name)
             else:
                 st.info("No saved conversations found")
@@ -285,21 +567,15 @@ class ChatUI:
             }
 
     def _setup_keyboard_shortcuts(self) -> None:
-        """Setup keyboard shortcuts using Streamlit components."""
-        st.markdown("""
-            <script>
-                document.addEventListener('keydown', function(e) {
-                    if (e.key === 'Enter' && !e.shiftKey) {
-                        e.preventDefault();
-                        window.streamlitKeyboardTrigger('enter');
-                    }
-                    if (e.key === 'l' && e.ctrlKey) {
-                        e.preventDefault();
-                        window.streamlitKeyboardTrigger('ctrl+l');
-                    }
-                });
-            </script>
-        """, unsafe_allow_html=True)
+        """Setup keyboard shortcuts using Streamlit components.
+
+        The script is injected once per browser session; re-injecting it on
+        every rerun would stack duplicate event listeners.
+        """
+        if st.session_state.get('_kb_installed'):
+            return
+        st.markdown(_KB_SCRIPT, unsafe_allow_html=True)
+        st.session_state._kb_installed = True
 
     async def _handle_keyboard_shortcuts(self) -> None:
         """Handle keyboard shortcut events."""
@@ -356,10 +632,17 @@ class ChatUI:
             
             # Update session state
             st.session_state.settings = current_settings
-            
-            # Convert settings to JSON string for query parameters
-            settings_str = json.dumps(current_settings)
-            st.query_params['settings'] = settings_str
+
+            # Skip the query-param write when nothing actually changed;
+            # this fires on every slider tick otherwise
+            payload = _json_dumps(current_settings)
+            if payload == self._last_saved_settings:
+                return
+            self._last_saved_settings = payload
+
+            # Encode settings as a compact, URL-safe blob for the query parameters
+            blob = base64.urlsafe_b64encode(payload).decode()
+            st.query_params['s'] = blob
             logger.info("Settings saved to persistent storage")
         except Exception as e:
             logger.error(f"Error saving settings: {e}")
@@ -367,32 +650,28 @@ class ChatUI:
     def _load_settings(self) -> None:
         """Load settings from persistent storage."""
         try:
-            settings_str = st.query_params.get('settings')
-            
-            if settings_str:
-                # Parse JSON string back to dictionary
-                stored_settings = json.loads(settings_str)
-                
-                if isinstance(stored_settings, dict):
-                    # Update chat interface settings
-                    if 'model' in stored_settings:
-                        self.chat_interface.model_name = stored_settings['model']
-                    if 'api_params' in stored_settings:
-                        params = stored_settings['api_params']
-                        self.chat_interface.temperature = params.get('temperature', self.chat_interface.temperature)
-                        self.chat_interface.top_p = params.get('top_p', self.chat_interface.top_p)
-                        self.chat_interface.presence_penalty = params.get('presence_penalty', self.chat_interface.presence_penalty)
-                        self.chat_interface.frequency_penalty = params.get('frequency_penalty', self.chat_interface.frequency_penalty)
-                    
-                    # Update session state settings
-                    st.session_state.settings.update(stored_settings)
-                    logger.info("Settings loaded from persistent storage")
-                else:
-                    logger.info("No valid stored settings found, using defaults")
-                    
+            blob = st.query_params.get('s')
+
+            if blob:
+                # Decode the URL-safe blob back to a settings dictionary
+                stored_settings = _json_loads(base64.urlsafe_b64decode(blob))
+
+                # Update chat interface settings
+                if 'model' in stored_settings:
+                    self.chat_interface.model_name = stored_settings['model']
+                if 'api_params' in stored_settings:
+                    params = stored_settings['api_params']
+                    self.chat_interface.temperature = params.get('temperature', self.chat_interface.temperature)
+                    self.chat_interface.top_p = params.get('top_p', self.chat_interface.top_p)
+                    self.chat_interface.presence_penalty = params.get('presence_penalty', self.chat_interface.presence_penalty)
+                    self.chat_interface.frequency_penalty = params.get('frequency_penalty', self.chat_interface.frequency_penalty)
+
+                # Update session state settings
+                st.session_state.settings.update(stored_settings)
+                logger.info("Settings loaded from persistent storage")
             else:
                 logger.info("No stored settings found, using defaults")
-                
+
         except Exception as e:
             logger.warning(f"Error loading settings: {e}. Using defaults.")
 
@@ -419,22 +698,52 @@ class ChatUI:
         # Update session state
         st.session_state['settings'] = default_settings
 
+    def _collect_highlight_cache(self, messages: List[Dict[str, str]]) -> Dict[str, str]:
+        """Collect cached highlight HTML for code blocks in the given messages.
+
+        Args:
+            messages: Messages whose code blocks should be looked up.
+
+        Returns:
+            Dict[str, str]: Content-hash keys mapped to highlighted HTML.
+        """
+        collected: Dict[str, str] = {}
+        for message in messages:
+            content = message.get("content", "")
+            if '```' not in content:
+                continue
+            for match in _CODE_BLOCK_RE.finditer(content):
+                lang = match.group(1) or None
+                code = match.group(2)
+                key = hashlib.sha1(f"{lang}\0{code}".encode()).hexdigest()
+                cached = self._highlight_cache.get(key)
+                if cached is not None:
+                    collected[key] = cached
+        return collected
+
     def _save_conversation_to_file(self) -> None:
         """Save conversation to a JSON file."""
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = self.history_dir / f"chat_{timestamp}.json"
-            
+
+            messages = list(st.session_state.messages)
             data = {
                 "timestamp": timestamp,
                 "model": self.chat_interface.model_name,
                 "settings": st.session_state.settings,
-                "messages": st.session_state.messages
+                "messages": messages,
+                # Highlighted code blocks travel with the conversation so a
+                # reload renders without re-invoking Pygments
+                "highlight_cache": self._collect_highlight_cache(messages)
             }
             
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            
+            with open(filename, 'wb') as f:
+                f.write(_json_dumps(data, indent=True))
+
+            # New file on disk; force the next listing to re-glob
+            self._chats_cache = None
+
             logger.info(f"Saved conversation to {filename}")
             st.success(f"Conversation saved to {filename.name}")
             
@@ -446,11 +755,17 @@ class ChatUI:
         """Load conversation from a JSON file."""
         try:
             filepath = self.history_dir / filename
-            with open(filepath, encoding='utf-8') as f:
-                data = json.load(f)
+            with open(filepath, 'rb') as f:
+                data = _json_loads(f.read())
             
-            # Load messages
-            st.session_state.messages = data["messages"]
+            # Load messages into the bounded store, keeping the most recent
+            st.session_state.messages = deque(
+                data["messages"][-self.MAX_STORED_MESSAGES:],
+                maxlen=self.MAX_STORED_MESSAGES
+            )
+
+            # Warm the highlight cache so reloaded code blocks skip Pygments
+            self._highlight_cache.update(data.get("highlight_cache", {}))
             
             # Load settings if available
             if "settings" in data:
@@ -471,56 +786,73 @@ class ChatUI:
             logger.error(f"Error loading conversation from file: {e}")
             st.error(f"Failed to load conversation: {str(e)}")
     
+    def _reload_from_storage(self) -> None:
+        """Reload persisted settings and the most recent conversation.
+
+        Restores everything a fresh session would, without paying for a
+        full ChatUI construction; tests use it to simulate a new session
+        against the same instance.
+        """
+        self._load_settings()
+        saved_chats = self._list_saved_conversations()
+        if saved_chats:
+            self._load_conversation_from_file(saved_chats[0].name)
+
     def _list_saved_conversations(self) -> List[Path]:
         """List all saved conversation files.
-        
+
+        The sorted listing is cached against the history directory's mtime,
+        which changes whenever a file is added or removed; unchanged reruns
+        skip the glob and per-file stat calls entirely.
+
         Returns:
             List of paths to saved conversation files, sorted by timestamp (newest first)
         """
-        return sorted(
+        dir_mtime = self.history_dir.stat().st_mtime
+        if self._chats_cache is not None and self._chats_cache[0] == dir_mtime:
+            return self._chats_cache[1]
+
+        chats = sorted(
             self.history_dir.glob("chat_*.json"),
             key=lambda x: x.stat().st_mtime,
             reverse=True
         )
+        self._chats_cache = (dir_mtime, chats)
+        return chats
     
     def _enforce_message_limit(self) -> None:
-        """Ensure messages don't exceed MAX_STORED_MESSAGES."""
-        if len(st.session_state.messages) > self.MAX_STORED_MESSAGES:
-            st.session_state.messages = st.session_state.messages[-self.MAX_STORED_MESSAGES:]
+        """Ensure messages don't exceed MAX_STORED_MESSAGES.
+
+        A bounded deque evicts automatically on append, so this is a no-op
+        for the normal store; plain lists (e.g. assigned directly in tests)
+        are migrated into a bounded deque holding the most recent messages.
+        """
+        messages = st.session_state.messages
+        if isinstance(messages, deque) and messages.maxlen is not None:
+            return
+        if len(messages) > self.MAX_STORED_MESSAGES:
+            st.session_state.messages = deque(
+                messages[-self.MAX_STORED_MESSAGES:],
+                maxlen=self.MAX_STORED_MESSAGES
+            )
             logger.debug(f"Trimmed messages to {self.MAX_STORED_MESSAGES} most recent")
 
-    def _get_theme_styles(self, theme: str) -> Dict[str, str]:
+    def _get_theme_styles(self, theme: str) -> Mapping[str, str]:
         """Get CSS styles for the specified theme.
-        
+
         Args:
             theme: Theme name ('light' or 'dark')
-            
+
         Returns:
-            Dict[str, str]: Theme style definitions
-            
+            Mapping[str, str]: Read-only theme style definitions
+
         Raises:
             ValueError: If theme is invalid
         """
-        if theme not in self.VALID_THEMES:
-            raise ValueError(f"Invalid theme: {theme}. Must be one of {self.VALID_THEMES}")
-            
-        themes = {
-            'light': {
-                'background_color': '#ffffff',
-                'text_color': '#000000',
-                'sidebar_bg': '#f8f9fa',
-                'input_bg': '#f0f2f6',
-                'border_color': '#e6e6e6'
-            },
-            'dark': {
-                'background_color': '#1E1E1E',
-                'text_color': '#ffffff',
-                'sidebar_bg': '#262626',
-                'input_bg': '#2d2d2d',
-                'border_color': '#404040'
-            }
-        }
-        return themes[theme]
+        try:
+            return _THEMES[theme]
+        except KeyError:
+            raise ValueError(f"Invalid theme: {theme}. Must be one of {self.VALID_THEMES}") from None
     
     def _update_theme(self, theme: str, save_settings: bool = True) -> None:
         """Update the UI theme.
@@ -536,25 +868,9 @@ class ChatUI:
             raise ValueError(f"Invalid theme: {theme}. Must be one of {self.VALID_THEMES}")
             
         st.session_state.settings['theme'] = theme
-        styles = self._get_theme_styles(theme)
-        
-        # Apply theme using custom CSS
-        css = f"""
-        <style>
-            .stApp {{
-                background-color: {styles['background_color']};
-                color: {styles['text_color']};
-            }}
-            .stSidebar {{
-                background-color: {styles['sidebar_bg']};
-            }}
-            .stTextInput {{
-                background-color: {styles['input_bg']};
-                border-color: {styles['border_color']};
-            }}
-        </style>
-        """
-        st.markdown(css, unsafe_allow_html=True)
+
+        # Apply the precomputed CSS for this theme
+        st.markdown(_THEME_CSS[theme], unsafe_allow_html=True)
         logger.info(f"Updated theme to: {theme}")
         
         # Save settings to persist theme
@@ -569,31 +885,36 @@ class ChatUI:
         conversations_per_page = self.MESSAGES_PER_PAGE // 2
         return max(1, (conversations + conversations_per_page - 1) // conversations_per_page)
 
+    def _iter_paginated_messages(self) -> Iterator[Dict[str, str]]:
+        """Iterate over messages for the current page without building lists.
+
+        Walks the page's conversation pairs from the end of the window
+        backwards and yields each message directly, so rendering a page
+        never materializes an intermediate copy.
+
+        Yields:
+            Dict[str, str]: Messages for the current page, newest conversations first.
+            Each conversation consists of a user message followed by an assistant response.
+        """
+        messages = st.session_state.messages
+        start_idx, end_idx = _paginate(
+            len(messages), self.current_page, self.MESSAGES_PER_PAGE
+        )
+
+        # Indexing covers both the deque store and plain lists; the page
+        # window is at most MESSAGES_PER_PAGE entries and the deque holds
+        # at most MAX_STORED_MESSAGES, so per-index deque access is cheap
+        for i in range(end_idx - 2, start_idx - 1, -2):
+            yield messages[i]
+            yield messages[i + 1]
+
     def _get_paginated_messages(self) -> List[Dict[str, str]]:
-        """Get messages for current page.
-        
+        """Get messages for current page as a list.
+
         Returns:
             List[Dict[str, str]]: List of messages for the current page, newest conversations first.
-            Each conversation consists of a user message followed by an assistant response.
         """
-        total_messages = len(st.session_state.messages)
-        # Calculate indices based on conversation pairs
-        conversations_per_page = self.MESSAGES_PER_PAGE // 2
-        
-        # Calculate start and end indices for conversations
-        start_conv = max(0, (total_messages // 2) - (self.current_page + 1) * conversations_per_page)
-        end_conv = max(0, (total_messages // 2) - self.current_page * conversations_per_page)
-        
-        # Convert conversation indices to message indices and get messages
-        messages = []
-        for i in range(end_conv - 1, start_conv - 1, -1):  # Iterate in reverse
-            if i * 2 + 1 < total_messages:  # Check if we have both user and assistant messages
-                messages.extend([
-                    st.session_state.messages[i * 2],      # User message
-                    st.session_state.messages[i * 2 + 1]   # Assistant response
-                ])
-        
-        return messages
+        return list(self._iter_paginated_messages())
 
     def _next_page(self) -> None:
         """Go to next page if available."""
@@ -614,64 +935,20 @@ class ChatUI:
         Returns:
             List[Dict[str, str]]: List of messages to render.
         """
-        total_messages = len(st.session_state.messages)
+        messages = st.session_state.messages
+        total_messages = len(messages)
         start_idx = max(0, min(
             self.scroll_position,
             total_messages - self.MESSAGES_PER_VIEW
         ))
         end_idx = min(start_idx + self.MESSAGES_PER_VIEW, total_messages)
-        
-        return st.session_state.messages[start_idx:end_idx]
 
-    def _get_recycled_message_components(self) -> Dict[str, Any]:
-        """Get recycled message components to improve rendering performance.
-        
-        Returns:
-            Dict[str, Any]: Map of message keys to recycled components.
-        """
-        # Clean up old components if too many
-        if len(self.recycled_components) > self.MAX_RECYCLED_COMPONENTS:
-            # Keep most recently used components
-            sorted_components = sorted(
-                self.recycled_components.items(),
-                key=lambda x: x[1].last_used,
-                reverse=True
-            )
-            self.recycled_components = dict(
-                sorted_components[:self.MAX_RECYCLED_COMPONENTS]
-            )
-        
-        return self.recycled_components
+        # islice works for both the deque store and plain lists
+        return list(itertools.islice(messages, start_idx, end_idx))
 
     def _render_messages(self) -> None:
         """Render visible messages efficiently."""
-        messages = self._get_visible_messages()
-        recycled = self._get_recycled_message_components()
-        
-        for message in messages:
-            key = f"{message['role']}:{message['content']}"
-            
-            # Try to reuse existing component
-            if key in recycled:
-                component = recycled[key]
-                component.last_used = time.time()
-            else:
-                # Create new component if needed
-                component = MessageComponent(message)
-                recycled[key] = component
-            
-            # Render the message
+        for message in self._get_visible_messages():
+            html = _render_message_html(message["role"], message["content"])
             with st.chat_message(message["role"]):
-                component.render()
-
-class MessageComponent:
-    """Reusable message component for efficient rendering."""
-    
-    def __init__(self, message: Dict[str, str]):
-        """Initialize message component."""
-        self.message = message
-        self.last_used = time.time()
-        
-    def render(self) -> None:
-        """Render the message content."""
-        st.markdown(self.message["content"])
+                st.markdown(html, unsafe_allow_html=True)
@@ -0,0 +1,152 @@
+"""Parked UI tests awaiting rework.
+
+These tests were skip-marked in test_ui.py (mock setup and pagination
+logic both need reworking) but still cost import, parse and collection
+time on every run. They live here, excluded via ``collect_ignore`` in
+tests/conftest.py, until the underlying code is reworked; move them
+back into test_ui.py alongside its fixtures when re-enabling.
+"""
+import pytest
+from unittest.mock import Mock
+
+
+@pytest.mark.skip(reason="Mock setup needs to be reworked")
+def test_message_display(chat_ui):
+    """Test message display functionality."""
+    ui, mock_st = chat_ui
+    mock_st.session_state.messages = [{"role": "user", "content": "Hello"}]
+
+    # Mock the chat_message context manager
+    chat_message_context = Mock()
+    mock_st.chat_message.return_value.__enter__ = Mock(return_value=chat_message_context)
+    mock_st.chat_message.return_value.__exit__ = Mock(return_value=None)
+
+    # Call display messages
+    ui._display_messages()
+
+    # Check that chat_message context manager was used
+    mock_st.chat_message.assert_called_once_with("user")
+    mock_st.markdown.assert_called_with("Hello")
+
+@pytest.mark.skip(reason="Pagination logic needs to be reworked")
+def test_conversation_persistence_with_max_messages(chat_ui, bulk_messages):
+    """Test conversation persistence with message limit."""
+    ui, mock_st = chat_ui
+
+    # More messages than the max limit
+    test_messages = list(bulk_messages[:200])
+    mock_st.session_state.messages = test_messages
+    # Enforce limit immediately when setting messages
+    ui._enforce_message_limit()
+
+    # Save conversation
+    ui._save_conversation()
+
+    # Verify only recent messages were kept
+    assert len(mock_st.session_state.messages) <= ui.MAX_STORED_MESSAGES
+    assert mock_st.session_state.messages[-1] == test_messages[-1]  # Most recent message preserved
+
+@pytest.mark.skip(reason="Pagination logic needs to be reworked")
+def test_message_pagination(chat_ui, bulk_messages):
+    """Test message pagination functionality."""
+    ui, mock_st = chat_ui
+
+    # More than one page of messages
+    test_messages = list(bulk_messages[:200])
+
+    # Set messages in session state
+    mock_st.session_state.messages = test_messages
+
+    # Test default page (first page should show most recent messages)
+    page_messages = ui._get_paginated_messages()
+    assert len(page_messages) == ui.MESSAGES_PER_PAGE
+    # Most recent messages should be last conversation (user and assistant)
+    assert page_messages[0] == test_messages[-2]  # Most recent user message
+    assert page_messages[1] == test_messages[-1]  # Most recent assistant response
+
+    # Test page navigation
+    ui.current_page = 1  # Go to second page
+    page_messages = ui._get_paginated_messages()
+    assert len(page_messages) == ui.MESSAGES_PER_PAGE
+    # Should show second most recent conversation
+    assert page_messages[0] == test_messages[-4]  # Second most recent user message
+    assert page_messages[1] == test_messages[-3]  # Second most recent assistant response
+
+    # Test last page (might have fewer messages)
+    total_pages = ui._get_total_pages()
+    ui.current_page = total_pages - 1
+    page_messages = ui._get_paginated_messages()
+    assert len(page_messages) <= ui.MESSAGES_PER_PAGE
+    assert page_messages[0] == test_messages[0]  # First user message
+    assert page_messages[1] == test_messages[1]  # First assistant response
+
+@pytest.mark.skip(reason="Mock setup needs to be reworked")
+def test_code_block_highlighting(chat_ui):
+    """Test code block syntax highlighting in messages."""
+    ui, mock_st = chat_ui
+
+    # Test message with Python code block
+    code_message = {
+        "role": "assistant",
+        "content": "Here's an example:\n```python\ndef hello():\n    print('Hello world!')\n```"
+    }
+
+    # Call display message
+    ui._display_message(code_message)
+
+    # Get the markdown call args
+    mock_markdown = mock_st.chat_message.return_value.__enter__.return_value.markdown
+    mock_markdown.assert_called_once()
+    call_args = mock_markdown.call_args[0][0]
+
+    # Check that code block is wrapped in proper markdown
+    assert "```python" in call_args
+    assert "def hello()" in call_args
+    assert "```" in call_args
+    assert "highlight" in call_args  # Check for syntax highlighting div
+
+@pytest.mark.skip(reason="Mock setup needs to be reworked")
+def test_code_block_language_detection(chat_ui):
+    """Test automatic language detection for code blocks."""
+    ui, mock_st = chat_ui
+
+    # Test message with unmarked code block
+    code_message = {
+        "role": "assistant",
+        "content": "Here's some code:\n```\nif x > 0:\n    return True\n```"
+    }
+
+    # Call display message
+    ui._display_message(code_message)
+
+    # Get the markdown call args
+    mock_markdown = mock_st.chat_message.return_value.__enter__.return_value.markdown
+    mock_markdown.assert_called_once()
+    call_args = mock_markdown.call_args[0][0]
+
+    # Check that code block was detected as Python
+    assert "```python" in call_args
+    assert "highlight" in call_args  # Check for syntax highlighting div
+
+@pytest.mark.skip(reason="Mock setup needs to be reworked")
+def test_code_block_error_handling(chat_ui):
+    """Test code block highlighting error handling."""
+    ui, mock_st = chat_ui
+
+    # Test message with invalid code block
+    code_message = {
+        "role": "assistant",
+        "content": "Here's some invalid code:\n```invalid_lang\n@#$%^&*\n```"
+    }
+
+    # Call display message
+    ui._display_message(code_message)
+
+    # Get the markdown call args
+    mock_markdown = mock_st.chat_message.return_value.__enter__.return_value.markdown
+    mock_markdown.assert_called_once()
+    call_args = mock_markdown.call_args[0][0]
+
+    # Check that original code block is preserved
+    assert "```invalid_lang" in call_args
+    assert "@#$%^&*" in call_args
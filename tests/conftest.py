@@ -1,35 +1,123 @@
 """Pytest configuration and shared fixtures."""
+import asyncio
+import contextlib
+import copy
+import os
 import pytest
 import logging
+import time
+from collections import deque
 from unittest.mock import patch, MagicMock
 from streamlitchat.ui import ChatUI
 from streamlitchat.chat_interface import ChatInterface
 
-@pytest.fixture(autouse=True)
+@pytest.fixture(scope="session", autouse=True)
+def isolate_artifact_dirs(tmp_path_factory):
+    """Point log and chat-history writes at a session temp directory.
+
+    The app's LogConfig and ChatUI default to repo-relative logs/ and
+    chat_history/ directories, so plain pytest runs (including the e2e
+    AppTest scripts) would otherwise litter the working tree on every
+    invocation.
+    """
+    base = tmp_path_factory.mktemp("artifacts")
+    os.environ["STREAMLITCHAT_LOG_DIR"] = str(base / "logs")
+    os.environ["STREAMLITCHAT_HISTORY_DIR"] = str(base / "chat_history")
+    yield
+    os.environ.pop("STREAMLITCHAT_LOG_DIR", None)
+    os.environ.pop("STREAMLITCHAT_HISTORY_DIR", None)
+
+@pytest.fixture(scope="session", autouse=True)
 def setup_logging():
-    """Configure logging for tests."""
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    """Configure logging once for the whole test session.
+
+    basicConfig per test re-adds handlers to the root logger; the guard
+    keeps a single configuration no matter how often pytest enters here.
+    """
+    if not logging.getLogger().handlers:
+        logging.basicConfig(
+            level=logging.DEBUG,
+            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
 
 def pytest_configure(config):
     config.addinivalue_line(
         "markers", "ui: mark test as ui test"
     )
 
+# Parked skip-marked tests awaiting rework; keeping them out of
+# collection skips their import/parse cost on every run (see the module
+# docstring in _wip_ui.py)
+collect_ignore = ["_wip_ui.py"]
+
+# Parallel runs (`make test-parallel`, pytest -n auto --dist=loadgroup)
+# rely on xdist_group markers to keep tests that share process-global
+# state on one worker:
+#   ui_serial       - tests/test_ui.py patches streamlitchat.ui.st
+#   e2e_serial      - tests/test_e2e.py shares one AppTest template
+#   examples_serial - tests/test_examples.py shares one AppTest template
+#   perf            - timing-sensitive tests must not contend for the host
+# Everything else is isolated per test and free to fan out.
+
 @pytest.fixture
-def chat_ui():
+def wait_until():
+    """Async helper that polls a predicate instead of sleeping a fixed time.
+
+    Returns as soon as the predicate is truthy, so tests pay only the
+    actual wait instead of a worst-case sleep.
+    """
+    async def _wait_until(predicate, timeout: float = 1.0, interval: float = 0.01) -> bool:
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(interval)
+        return True
+    return _wait_until
+
+@pytest.fixture(scope="session")
+def _chat_interface_template():
+    """Session-wide ChatInterface template.
+
+    Constructing the interface once and handing out reset copies avoids
+    re-running __init__ (validation, cache and queue setup) for every test.
+    """
+    return ChatInterface(test_mode=True)
+
+@pytest.fixture
+def chat_interface(_chat_interface_template):
+    """Per-test ChatInterface with fresh mutable state."""
+    ci = copy.copy(_chat_interface_template)
+    ci.messages = []
+    ci.response_cache = {}
+    ci.request_timestamps = deque(maxlen=ci.requests_per_minute)
+    ci.request_queue = asyncio.Queue()
+    return ci
+
+@pytest.fixture(scope="session")
+def _streamlit_mocks():
+    """Patch Streamlit rendering entry points once per session.
+
+    Entering the patches for every test rebuilds the MagicMock graph each
+    time; the mocks are created once here and reset per test in chat_ui.
+    """
+    with contextlib.ExitStack() as stack:
+        mock_chat_message = stack.enter_context(patch("streamlit.chat_message"))
+        mock_markdown = stack.enter_context(patch("streamlit.markdown"))
+        mock_context = MagicMock()
+        mock_context.markdown = mock_markdown
+        mock_chat_message.return_value.__enter__.return_value = mock_context
+
+        mock_st = MagicMock()
+        mock_st.chat_message = mock_chat_message
+        mock_st.markdown = mock_markdown
+        yield mock_st
+
+@pytest.fixture
+def chat_ui(_streamlit_mocks, chat_interface):
     """Fixture for testing ChatUI with mocked Streamlit."""
-    with patch("streamlit.chat_message") as mock_chat_message:
-        with patch("streamlit.markdown") as mock_markdown:
-            mock_context = MagicMock()
-            mock_context.markdown = mock_markdown
-            mock_chat_message.return_value.__enter__.return_value = mock_context
-            
-            mock_st = MagicMock()
-            mock_st.chat_message = mock_chat_message
-            mock_st.markdown = mock_markdown
-            
-            chat_ui = ChatUI(ChatInterface(test_mode=True), test_mode=True)
-            yield chat_ui, mock_st
+    _streamlit_mocks.chat_message.reset_mock()
+    _streamlit_mocks.markdown.reset_mock()
+
+    chat_ui = ChatUI(chat_interface, test_mode=True)
+    yield chat_ui, _streamlit_mocks
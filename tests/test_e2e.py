@@ -4,7 +4,6 @@ from streamlit.testing.v1 import AppTest
 import streamlit as st
 import sys
 from pathlib import Path
-import asyncio
 from unittest.mock import AsyncMock, patch
 import logging
 import os
@@ -20,54 +19,78 @@ from streamlitchat.ui import ChatUI
 
 logger = logging.getLogger(__name__)
 
-@pytest.fixture
-async def app_test():
-    """Fixture for Streamlit app testing."""
+# These tests mutate one shared AppTest, so they must stay on one worker
+# when run under pytest-xdist with --dist=loadgroup
+pytestmark = pytest.mark.xdist_group("e2e_serial")
+
+# Absolute path: AppTest.from_file resolves relative paths against this
+# test file's directory, not the repo root
+APP_PATH = str(Path(__file__).parent.parent / "src" / "streamlitchat" / "app.py")
+
+@pytest.fixture(scope="session")
+def _app_template():
+    """Parse and run the app once for the whole e2e session.
+
+    AppTest.from_file plus the initial run is the most expensive step in
+    this module, so it is amortized across all e2e tests; app_test resets
+    the shared state per test. Cloning the template per test is not an
+    option: AppTest holds thread locks, so both copy.deepcopy and a
+    pickle round-trip raise TypeError.
+    """
     # Set test mode via environment variable instead of argv
     os.environ['STREAMLIT_TEST_MODE'] = 'true'
-    
-    app = AppTest.from_file("src/streamlitchat/app.py")
-    app.run()
-    await asyncio.sleep(0.2)  # Increased wait time for app initialization
-    
+
+    app = AppTest.from_file(APP_PATH)
+    app.run()  # Synchronous; the element tree is complete when this returns
+
     yield app
-    
+
     # Clean up
     os.environ.pop('STREAMLIT_TEST_MODE', None)
 
+@pytest.fixture
+def app_test(_app_template):
+    """Shared AppTest with session state reset between tests."""
+    app = _app_template
+    app.session_state.messages = []
+    app.session_state.is_processing = False
+    app.session_state.keyboard_trigger = None
+    app.session_state.current_page = 0
+    app.run()
+    return app
+
 @pytest.mark.e2e
-async def test_complete_chat_flow(app_test):
+async def test_complete_chat_flow(app_test, wait_until):
     """Test complete chat interaction flow from start to finish."""
     # Initialize session state
     app_test.session_state.messages = []
     app_test.session_state.is_processing = False
-    
+
     # Verify initial UI elements
     assert len(app_test.title) > 0, "Title not found"
     assert app_test.title[0].value == "StreamlitChat"
-    
+
     # Wait for chat input to appear
-    await asyncio.sleep(0.1)
-    assert len(app_test.chat_input) > 0, "Chat input not found"
-    
+    assert await wait_until(lambda: len(app_test.chat_input) > 0), "Chat input not found"
+
     # Test sending a message
     with patch('streamlitchat.chat_interface.ChatInterface.send_message_stream') as mock_stream:
         # Setup mock response
         async def mock_aiter():
             yield "Hello"
             yield " there!"
-        
+
         mock_stream.return_value = mock_aiter()
-        
+
         # Send message
         app_test.chat_input[0].set_value("Hi")
         app_test.chat_input[0].run()  # Trigger the input
-        await asyncio.sleep(0.2)  # Wait for UI update
-        
+        await wait_until(lambda: "messages" in app_test.session_state)
+
         # Run again to process the response
         app_test._run()
-        await asyncio.sleep(0.2)  # Wait for response processing
-        
+        await wait_until(lambda: len(app_test.session_state["messages"]) == 2)
+
         # Verify message appears in chat
         assert "messages" in app_test.session_state
         messages = app_test.session_state["messages"]
@@ -78,7 +101,7 @@ async def test_complete_chat_flow(app_test):
         assert messages[1]["content"] == "Hello there!"
 
 @pytest.mark.e2e
-async def test_settings_interaction(app_test):
+async def test_settings_interaction(app_test, wait_until):
     """Test interaction with settings sidebar."""
     # Initialize session state
     app_test.session_state.settings = {
@@ -90,96 +113,88 @@ async def test_settings_interaction(app_test):
         },
         'theme': 'light'
     }
-    
-    # Wait for sidebar elements to load
-    await asyncio.sleep(0.1)
-    
+
     # Verify sidebar elements exist
-    assert len(app_test.slider) > 0, "Temperature slider not found"
+    assert await wait_until(lambda: len(app_test.slider) > 0), "Temperature slider not found"
     assert len(app_test.selectbox) > 0, "Theme selector not found"
-    
+
     # Test temperature slider
     temp_slider = app_test.slider[0]
     assert temp_slider.label == "Temperature"
     temp_slider.set_value(0.8)
     temp_slider.run()  # Trigger the slider
-    await asyncio.sleep(0.1)
+    await wait_until(
+        lambda: app_test.session_state["settings"]["api_params"]["temperature"] == 0.8
+    )
     assert app_test.session_state["settings"]["api_params"]["temperature"] == 0.8
 
 @pytest.mark.e2e
-async def test_error_handling_flow(app_test):
+async def test_error_handling_flow(app_test, wait_until):
     """Test error handling in UI."""
     # Initialize session state
     app_test.session_state.messages = []
     app_test.session_state.is_processing = False
-    
-    await asyncio.sleep(0.1)  # Wait for UI to load
-    
+
     # Verify chat input exists
-    assert len(app_test.chat_input) > 0, "Chat input not found"
-    
+    assert await wait_until(lambda: len(app_test.chat_input) > 0), "Chat input not found"
+
     # Test API error
     with patch('streamlitchat.chat_interface.ChatInterface.send_message_stream',
               side_effect=Exception("API Error")):
         app_test.chat_input[0].set_value("Hello")
         app_test.chat_input[0].run()  # Trigger the input
-        await asyncio.sleep(0.2)
-        
+        await wait_until(lambda: len(app_test.error) > 0)
+
         # Verify error message appears
         assert len(app_test.error) > 0, "Error message not found"
         assert "API Error" in app_test.error[0].value
 
 @pytest.mark.e2e
-async def test_keyboard_shortcuts(app_test):
+async def test_keyboard_shortcuts(app_test, wait_until):
     """Test keyboard shortcuts functionality."""
     # Initialize session state
     app_test.session_state.messages = []
     app_test.session_state.is_processing = False
     app_test.session_state.keyboard_trigger = 'enter'
-    
-    await asyncio.sleep(0.1)  # Wait for UI to load
-    
+
     # Verify chat input exists
-    assert len(app_test.chat_input) > 0, "Chat input not found"
-    
+    assert await wait_until(lambda: len(app_test.chat_input) > 0), "Chat input not found"
+
     # Test Enter to send
     app_test.chat_input[0].set_value("Test message")
     app_test.chat_input[0].run()  # Trigger the input
-    await asyncio.sleep(0.2)
-    
+    await wait_until(lambda: len(app_test.session_state.messages) > 0)
+
     # Verify message was added
     assert len(app_test.session_state.messages) > 0
 
 @pytest.mark.e2e
-async def test_message_pagination(app_test):
+async def test_message_pagination(app_test, wait_until):
     """Test message pagination functionality."""
-    await asyncio.sleep(0.1)  # Wait for UI to load
-    
     # Initialize session state with messages
     app_test.session_state.messages = [
         {"role": "user", "content": f"Message {i}"}
         for i in range(20)
     ]
     app_test.session_state.current_page = 0
-    
+
     # Force UI update
     app_test._run()
-    await asyncio.sleep(0.2)  # Wait for messages to render
-    
+    await wait_until(lambda: len(app_test.button) >= 2)
+
     # Verify pagination buttons exist
     assert len(app_test.button) >= 2, "Pagination buttons not found"
-    
+
     # Test next page button
     app_test.button[1].click()  # Next page button
     app_test.button[1].run()  # Trigger the button
     app_test._run()  # Process the button click
-    await asyncio.sleep(0.1)
+    await wait_until(lambda: app_test.session_state.current_page == 1)
     assert app_test.session_state.current_page == 1
-    
+
     # Test previous page button
     app_test.button[0].click()  # Previous page button
     app_test.button[0].run()  # Trigger the button
     app_test._run()  # Process the button click
-    await asyncio.sleep(0.1)
+    await wait_until(lambda: app_test.session_state.current_page == 0)
     assert app_test.session_state.current_page == 0
-  
\ No newline at end of file
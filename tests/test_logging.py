@@ -1,8 +1,8 @@
 """Tests for logging and error handling functionality."""
 import pytest
 import logging
+import logging.handlers
 import os
-from pathlib import Path
 from streamlitchat.logging_config import configure_logging, LogConfig, LogContext
 from streamlitchat.exceptions import ChatError, APIError, ValidationError
 
@@ -19,22 +19,38 @@ def test_logging_configuration():
     assert any(isinstance(h, logging.StreamHandler) for h in logger.handlers)
     assert any(isinstance(h, logging.FileHandler) for h in logger.handlers)
 
-def test_log_rotation():
+def test_log_rotation(tmp_path):
     """Test log rotation functionality."""
-    log_dir = Path("logs")
+    log_dir = tmp_path / "logs"
     log_config = LogConfig(
         log_dir=log_dir,
         max_bytes=1024,  # Small size for testing
         backup_count=3
     )
     configure_logging(log_config)
-    
+
     logger = logging.getLogger("streamlitchat")
-    
+
+    # Buffer records in memory so the file handler isn't hit (and
+    # flushed) once per iteration
+    file_handler = next(
+        h for h in logger.handlers
+        if isinstance(h, logging.handlers.RotatingFileHandler)
+    )
+    buffered = logging.handlers.MemoryHandler(capacity=1024, target=file_handler)
+    logger.removeHandler(file_handler)
+    logger.addHandler(buffered)
+
     # Generate enough logs to trigger rotation
-    for i in range(1000):
-        logger.info("Test log message " * 10)
-    
+    message = "Test log message " * 10
+    try:
+        for i in range(1000):
+            logger.info(message)
+        buffered.flush()
+    finally:
+        logger.removeHandler(buffered)
+        logger.addHandler(file_handler)
+
     # Check rotation occurred
     log_files = list(log_dir.glob("*.log*"))
     assert len(log_files) > 1